@@ -1,4 +1,7 @@
-from unittest.mock import patch, mock_open
+import json
+import warnings
+import pytest
+from unittest.mock import MagicMock, patch, mock_open
 from wikitools import Archive
 from pathlib import Path
 
@@ -37,3 +40,196 @@ def test_analysis(bulbapedia_html):
         assert result.at["the", "occ_wiki"] == 0.25
         val = result.at["bulbazaur", "occ_lang"]
         assert val >= 0 and val <= 1
+
+
+def make_archive(tmp_path):
+    return Archive(
+        "https://bulbapedia.bulbagarden.net",
+        "/wiki/",
+        "en",
+        "<!-- start content -->",
+        "<!-- end content -->",
+        tmp_path / "word-counts.json",
+    )
+
+
+def read_dictionary(tmp_path):
+    with open(tmp_path / "word-counts.json", "r") as file:
+        return json.load(file)
+
+
+def test_count_words_ledger(tmp_path):
+    archive = make_archive(tmp_path)
+    with patch("wikitools.archive.Scraper") as scraper:
+        scraper.return_value.count_words.return_value = {"pikachu": 2, "the": 1}
+        archive.count_words("Pikachu")
+        scraper.return_value.count_words.return_value = {"ash": 1, "the": 3}
+        archive.count_words("Ash")
+        assert read_dictionary(tmp_path) == {"pikachu": 2, "the": 4, "ash": 1}
+
+        # Counting an unchanged article again should not inflate totals
+        make_archive(tmp_path).count_words("Ash")
+        assert read_dictionary(tmp_path) == {"pikachu": 2, "the": 4, "ash": 1}
+
+        # Counting a changed article should only apply the difference
+        scraper.return_value.count_words.return_value = {"the": 1, "raichu": 1}
+        make_archive(tmp_path).count_words("Pikachu")
+        assert read_dictionary(tmp_path) == {"the": 4, "ash": 1, "raichu": 1}
+
+        # Different spellings of the same article share one entry
+        scraper.return_value.count_words.return_value = {"ash": 1, "the": 3}
+        make_archive(tmp_path).count_words("Ash%20Ketchum")
+        make_archive(tmp_path).count_words("Ash Ketchum")
+        make_archive(tmp_path).count_words("Ash_Ketchum")
+        assert read_dictionary(tmp_path) == {"the": 7, "ash": 2, "raichu": 1}
+
+
+def test_count_words_fragment(tmp_path):
+    archive = make_archive(tmp_path)
+    with patch("wikitools.archive.Scraper") as scraper:
+        scraper.return_value.count_words.return_value = {"badge": 5}
+        archive.count_words("Badge#Boulder_Badge")
+        archive.count_words("Badge#Cascade_Badge")
+        archive.count_words("Badge")
+        assert read_dictionary(tmp_path) == {"badge": 5}
+
+        # The page is fetched without the fragment
+        scraper.assert_called_with("https://bulbapedia.bulbagarden.net/wiki/Badge")
+
+
+def test_count_words_interleaved_archives(tmp_path):
+    first = make_archive(tmp_path)
+    second = make_archive(tmp_path)
+    with patch("wikitools.archive.Scraper") as scraper:
+        scraper.return_value.count_words.return_value = {"p": 1}
+        first.count_words("P")
+        scraper.return_value.count_words.return_value = {"q": 1}
+        second.count_words("Q")
+        scraper.return_value.count_words.return_value = {"r": 1}
+        first.count_words("R")
+        assert read_dictionary(tmp_path) == {"p": 1, "q": 1, "r": 1}
+
+        # Unsaved updates are kept when the other archive saves in between
+        scraper.return_value.count_words.return_value = {"s": 1}
+        first.count_words("S", save=False)
+        scraper.return_value.count_words.return_value = {"t": 1}
+        second.count_words("T")
+        first.save()
+        assert read_dictionary(tmp_path) == {"p": 1, "q": 1, "r": 1, "s": 1, "t": 1}
+
+
+def test_count_words_deleted_dictionary(tmp_path):
+    archive = make_archive(tmp_path)
+    with patch("wikitools.archive.Scraper") as scraper:
+        scraper.return_value.count_words.return_value = {"a": 2}
+        archive.count_words("P")
+
+        # Deleting the dictionary resets the archive, ledger included
+        (tmp_path / "word-counts.json").unlink()
+        archive.count_words("P")
+        assert read_dictionary(tmp_path) == {"a": 2}
+
+        (tmp_path / "word-counts.json").unlink()
+        scraper.return_value.count_words.return_value = {"a": 1, "b": 1}
+        make_archive(tmp_path).count_words("P")
+        assert read_dictionary(tmp_path) == {"a": 1, "b": 1}
+
+
+def test_count_words_legacy_dictionary(tmp_path):
+    with open(tmp_path / "word-counts.json", "w") as file:
+        json.dump({"a": 5, "c": 1}, file)
+
+    with patch("wikitools.archive.Scraper") as scraper:
+        scraper.return_value.count_words.return_value = {"a": 2, "b": 1}
+        make_archive(tmp_path).count_words("P")
+        make_archive(tmp_path).count_words("P")
+        assert read_dictionary(tmp_path) == {"a": 7, "b": 1, "c": 1}
+
+        scraper.return_value.count_words.return_value = {"a": 1}
+        make_archive(tmp_path).count_words("P")
+        assert read_dictionary(tmp_path) == {"a": 6, "c": 1}
+
+
+def test_count_words_interrupted_save(tmp_path):
+    with patch("wikitools.archive.Scraper") as scraper:
+        scraper.return_value.count_words.return_value = {"a": 2}
+        make_archive(tmp_path).count_words("P")
+
+        # Stop the save after the ledger was written, before the dictionary
+        scraper.return_value.count_words.return_value = {"a": 3}
+        with patch("wikitools.archive.os.replace", side_effect=[None, OSError]):
+            with pytest.raises(OSError):
+                make_archive(tmp_path).count_words("P")
+        assert read_dictionary(tmp_path) == {"a": 2}
+
+        # The retry should neither apply the update twice nor lose it
+        make_archive(tmp_path).count_words("P")
+        assert read_dictionary(tmp_path) == {"a": 3}
+
+
+def test_count_words_failed_save(tmp_path):
+    archive = make_archive(tmp_path)
+    with patch("wikitools.archive.Scraper") as scraper:
+        scraper.return_value.count_words.return_value = {"a": 2}
+        archive.count_words("P")
+
+        # Ledger write fails, then the same archive saves again
+        scraper.return_value.count_words.return_value = {"a": 3}
+        with patch("wikitools.archive.os.replace", side_effect=OSError):
+            with pytest.raises(OSError):
+                archive.count_words("P")
+        scraper.return_value.count_words.return_value = {"a": 4}
+        archive.count_words("P")
+
+        # A later save stops between the two files
+        scraper.return_value.count_words.return_value = {"a": 5}
+        with patch("wikitools.archive.os.replace", side_effect=[None, OSError]):
+            with pytest.raises(OSError):
+                archive.count_words("P")
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            make_archive(tmp_path).count_words("P")
+        assert read_dictionary(tmp_path) == {"a": 5}
+
+
+def test_auto_count_words_saves_periodically(tmp_path):
+    archive = make_archive(tmp_path)
+    pages = {"A": ["B", "C#Section"], "B": ["A"], "C": []}
+
+    def make_scraper(source):
+        phrase = source.rsplit("/", 1)[-1]
+        scraper = MagicMock()
+        scraper.count_words.return_value = {phrase.lower(): 1}
+        scraper.get_wiki_links.return_value = pages[phrase]
+        return scraper
+
+    save = Archive.save
+    saved = []
+
+    def record_save(self):
+        saved.append(len(self._pending))
+        save(self)
+
+    with (
+        patch("wikitools.archive.Scraper", side_effect=make_scraper),
+        patch("wikitools.archive.Archive.save", autospec=True, side_effect=record_save),
+        patch("wikitools.archive.time.sleep"),
+    ):
+        archive.auto_count_words("A", 1, 0, set(), save_every=2)
+    assert saved == [2, 1]
+    assert read_dictionary(tmp_path) == {"a": 1, "b": 1, "c": 1}
+
+
+def test_count_words_modified_dictionary(tmp_path):
+    with patch("wikitools.archive.Scraper") as scraper:
+        scraper.return_value.count_words.return_value = {"a": 2}
+        make_archive(tmp_path).count_words("P")
+
+        with open(tmp_path / "word-counts.json", "w") as file:
+            json.dump({"a": 1}, file)
+
+        # Ledger no longer matches, so its entries are not trusted
+        with pytest.warns(UserWarning):
+            make_archive(tmp_path).count_words("P")
+        assert read_dictionary(tmp_path) == {"a": 3}
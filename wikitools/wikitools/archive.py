@@ -1,7 +1,11 @@
 import pandas as pd
 from tabulate import tabulate
 import json
+import hashlib
+import os
+import warnings
 from pathlib import Path
+from urllib.parse import unquote
 from .scraper import Scraper
 import time
 import wordfreq
@@ -40,49 +44,213 @@ class Archive:
         """
         self.wiki_prefix = wiki_prefix
         self.dict_path = dict_path
+        # Per-article ledger kept next to the dictionary file.
+        self.ledger_path = dict_path.with_name(f"{dict_path.stem}-ledger.json")
+        self._ledger: dict | None = None
+        # Article counts applied in memory but not saved yet.
+        self._pending: dict[str, dict[str, int]] = {}
         self.prefix_length = len(wiki_prefix)
         self.wiki_identifier = wiki_identifier
         self.wiki_lang = wiki_lang
         self.start_marker = start_marker
         self.end_marker = end_marker
 
-    def count_words(self, phrase: str, scrape_links: bool = False) -> None | list[str]:
+    def count_words(
+        self, phrase: str, scrape_links: bool = False, save: bool = True
+    ) -> None | list[str]:
         """
         Adds words from article 'phrase' to the archive dictionary.
+        Counts from earlier visits of the article are replaced, not added again,
+        and the dictionary is left untouched if the article did not change.
         Scrapes URLs linking back to wiki if indicated.
 
         :param phrase: Article name to look for
         :type phrase: str
         :param scrape_links: If true, also returns the URLs
         :type scrape_links: bool
+        :param save: If false, keeps the update in memory until save() is called
+        :type save: bool
         :return: List of URLs if scrape_links=1, None otherwise
         :rtype: list[str] | None
         """
-        # Fetch dictionary file if present.
-        global_dictionary = {}
-        if self.dict_path.is_file():
-            with open(self.dict_path, "r") as file:
-                global_dictionary = json.load(file)
-
         # Scrape the url with our phrase.
-        source = f"{self.wiki_prefix}{self.wiki_identifier}{phrase}"
+        key = self._article_key(phrase)
+        source = f"{self.wiki_prefix}{self.wiki_identifier}{key}"
         scraper = Scraper(source)
         local_dictionary = scraper.count_words(self.start_marker, self.end_marker)
 
-        # Write down the scraped values in dictionary file.
-        for item in local_dictionary.items():
-            global_dictionary[item[0]] = global_dictionary.get(item[0], 0) + item[1]
-        with open(self.dict_path, "w") as file:
-            json.dump(global_dictionary, file)
+        # Replace the previous counts of the article if they changed.
+        ledger = self._load_ledger()
+        old_counts = ledger["articles"].get(key, {})
+        if old_counts != local_dictionary:
+            self._apply_counts(ledger["counts"], old_counts, local_dictionary)
+            ledger["articles"][key] = local_dictionary
+            self._pending[key] = local_dictionary
+            if save:
+                self.save()
 
         # Scrape all wiki links from the page if needed.
         if scrape_links:
             return scraper.get_wiki_links(self.wiki_identifier)
 
-    def auto_count_words(self, phrase: str, depth: int, wait: float, visited: set[str]):
+    def save(self) -> None:
+        """
+        Writes unsaved updates of the archive dictionary and its ledger to disk.
+        The ledger is replaced first, so an interrupted save is detected and
+        finished on the next load.
+        """
+        if not self._pending:
+            return
+        ledger = self._load_ledger()
+        content = json.dumps(ledger["counts"]).encode()
+        saved_ledger = {
+            **ledger,
+            "generation": hashlib.sha256(content).hexdigest(),
+            "previous": ledger["generation"],
+        }
+        self._replace_file(self.ledger_path, json.dumps(saved_ledger).encode())
+        self._replace_file(self.dict_path, content)
+
+        # Only mark the update as saved once both files reached the disk.
+        self._ledger = saved_ledger
+        self._pending = {}
+
+    def _load_ledger(self) -> dict:
+        """
+        Fetches the per-article ledger, checking it against the dictionary file.
+        The ledger kept in memory is reused while the dictionary file matches it,
+        otherwise it is read again and unsaved updates are applied on top.
+
+        :return: Ledger with keys 'generation', 'previous', 'counts', 'articles'
+        :rtype: dict
+        """
+        content = None
+        content_hash = None
+        if self.dict_path.is_file():
+            with open(self.dict_path, "rb") as file:
+                content = file.read()
+            content_hash = hashlib.sha256(content).hexdigest()
+
+        if self._ledger is not None and content_hash == self._ledger["generation"]:
+            return self._ledger
+
+        ledger = self._read_ledger(content, content_hash)
+        for key, counts in self._pending.items():
+            self._apply_counts(
+                ledger["counts"], ledger["articles"].get(key, {}), counts
+            )
+            ledger["articles"][key] = counts
+        self._ledger = ledger
+        return ledger
+
+    def _read_ledger(self, content: bytes | None, content_hash: str | None) -> dict:
+        """
+        Reads the ledger file matching the dictionary file content.
+
+        :param content: Content of the dictionary file, None if it is missing
+        :type content: bytes | None
+        :param content_hash: SHA-256 of the content, None if it is missing
+        :type content_hash: str | None
+        :return: Ledger with keys 'generation', 'previous', 'counts', 'articles'
+        :rtype: dict
+        """
+        ledger = {"generation": None, "previous": None, "counts": {}, "articles": {}}
+
+        # Deleting the dictionary file resets the archive, ledger included.
+        if content is None:
+            return ledger
+
+        if self.ledger_path.is_file():
+            with open(self.ledger_path, "r") as file:
+                stored = json.load(file)
+            if content_hash == stored["generation"]:
+                return stored
+            if content_hash == stored["previous"]:
+                # Previous save stopped between the two files, finish it.
+                self._replace_file(
+                    self.dict_path, json.dumps(stored["counts"]).encode()
+                )
+                return stored
+            warnings.warn(
+                f"{self.dict_path} was modified outside of the archive, "
+                "its counts will not be matched to articles"
+            )
+
+        # Dictionary without a matching ledger, keep its counts as they are.
+        ledger["generation"] = content_hash
+        ledger["counts"] = json.loads(content)
+        return ledger
+
+    @staticmethod
+    def _replace_file(path: Path, content: bytes) -> None:
+        """
+        Atomically replaces the file at 'path' with 'content'.
+
+        :param path: File to replace
+        :type path: Path
+        :param content: New content of the file
+        :type content: bytes
+        """
+        temp_path = path.with_name(f"{path.name}.tmp")
+        with open(temp_path, "wb") as file:
+            file.write(content)
+        os.replace(temp_path, path)
+
+    @staticmethod
+    def _article_key(phrase: str) -> str:
+        """
+        Normalizes article name so different spellings of a link match.
+
+        :param phrase: Article name, possibly URL-encoded, with spaces or fragment
+        :type phrase: str
+        :return: Decoded article name without fragment, spaces replaced by underscores
+        :rtype: str
+        """
+        return unquote(phrase).split("#", 1)[0].replace(" ", "_")
+
+    @staticmethod
+    def _apply_counts(
+        global_dictionary: dict[str, int],
+        old_counts: dict[str, int],
+        new_counts: dict[str, int],
+    ) -> None:
+        """
+        Updates the dictionary by the difference between two word counts.
+
+        :param global_dictionary: Dictionary to update
+        :type global_dictionary: dict[str, int]
+        :param old_counts: Counts previously added for an article
+        :type old_counts: dict[str, int]
+        :param new_counts: Counts that should replace them
+        :type new_counts: dict[str, int]
+        :raises ValueError: If a count would become negative
+        """
+        for word in old_counts.keys() | new_counts.keys():
+            delta = new_counts.get(word, 0) - old_counts.get(word, 0)
+            value = global_dictionary.get(word, 0) + delta
+            if value < 0:
+                raise ValueError(
+                    f"Count of '{word}' would become negative, "
+                    "ledger does not match the dictionary"
+                )
+            if value == 0:
+                global_dictionary.pop(word, None)
+            else:
+                global_dictionary[word] = value
+
+    def auto_count_words(
+        self,
+        phrase: str,
+        depth: int,
+        wait: float,
+        visited: set[str],
+        save_every: int = 10,
+    ):
         """
         Goes through the wiki DFS-style starting on article 'phrase'.
         Calls recursively on all wiki pages linked in the article.
+        The dictionary is saved every 'save_every' updated articles and once
+        the traversal ends or is interrupted.
 
         :param phrase: Article name to start with
         :type phrase: str
@@ -92,19 +260,35 @@ class Archive:
         :type wait: float
         :param visited: Articles already visited
         :type visited: set[str]
+        :param save_every: Number of updated articles kept in memory between saves
+        :type save_every: int
+        """
+        try:
+            self._auto_count_words(phrase, depth, wait, visited, save_every)
+        finally:
+            self.save()
+
+    def _auto_count_words(
+        self, phrase: str, depth: int, wait: float, visited: set[str], save_every: int
+    ):
+        """
+        Recursive part of auto_count_words.
         """
         # Prevent infinite recursion.
-        if phrase in visited:
+        key = self._article_key(phrase)
+        if key in visited:
             return
-        visited.add(phrase)
+        visited.add(key)
 
         print(phrase)
 
         # Update the dictionary file and fetch links to wiki.
-        wiki_links = self.count_words(phrase, scrape_links=True)
+        wiki_links = self.count_words(phrase, scrape_links=True, save=False)
         if wiki_links is None:
             print("Error")
             return
+        if len(self._pending) >= save_every:
+            self.save()
 
         # Wait to prevent sending too many requests.
         time.sleep(wait)
@@ -117,7 +301,7 @@ class Archive:
         # links are visited.
         if depth > 0:
             for link in wiki_links:
-                self.auto_count_words(link, depth - 1, wait, visited)
+                self._auto_count_words(link, depth - 1, wait, visited, save_every)
 
     def analyze_relative_word_frequency(self, mode: str, count: int) -> pd.DataFrame:
         """